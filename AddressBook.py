@@ -1,30 +1,62 @@
 from collections import UserDict
+import weakref
 from abc import ABC, abstractmethod
 import re
-from datetime import date, timedelta
+from calendar import isleap
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from operator import itemgetter
+from datetime import date
 import typing as t
 
 
+_NGRAM_SIZE = 3
+
+
+def _md_key(day: date) -> int:  # orders dates by month and day, ignoring the year
+    return day.month * 32 + day.day
+
+
+def _birthday_ordinal(year: int, birthday: date) -> int:
+    try:
+        return date(year, birthday.month, birthday.day).toordinal()
+    except ValueError:  # born on Feb 29 and this is not a leap year, count it as Mar 1
+        return date(year, 3, 1).toordinal()
+
+
+def _ngrams(text: str) -> set[str]:
+    return {text[i:i + _NGRAM_SIZE] for i in range(len(text) - _NGRAM_SIZE + 1)}
+
+
 # abstract base class that defines the common properties and methods for all field types, including the validation logic
 # Each specific field type (Name, Phone, Email, Birthday, Address) inherits from AbstractField and provides its own validation logic by implementing the _validate method
 # each class has a single responsibility: representing a specific field type and validating its value
 
 class AbstractField(ABC):
+    __slots__ = ('_value',)
+    _value: str
+
     def __init__(self, value: str) -> None:
-        self._value = None
-        self.value = value
+        normalized = self._validate(value)
+        self._value = value if normalized is None else normalized
 
+    @classmethod
+    def _trusted(cls, value: str) -> t.Self:  # builds a field from a known valid value, skipping _validate
+        field = cls.__new__(cls)
+        field._load(value)
+        return field
+
+    # read-only: records, phone dicts and book indexes rely on a field never changing,
+    # so a new value means a new field (see Record.change_*)
     @property
     def value(self) -> str:
         return self._value
 
-    @value.setter
-    def value(self, value: str) -> None:
-        self._validate(value)
+    def _load(self, value: str) -> None:  # stores a value already checked by _validate
         self._value = value
 
     @abstractmethod
-    def _validate(selfself, value: str) -> None:
+    def _validate(self, value: str) -> str | None:  # may return a normalized value to store
         pass
 
     def __str__(self) -> str:
@@ -34,32 +66,55 @@ class AbstractField(ABC):
         return f"{self.__class__.__name__}(value={self.value})"
 
     def __eq__(self, val):  # ==
+        if val is self:
+            return True
         if isinstance(val, self.__class__):
             val = val.value
         return self.value == val
 
+    # hashes like the plain value, so a field equals and finds its str in sets/dicts
+    def __hash__(self) -> int:
+        return hash(self._value)
+
 
 class Name(AbstractField):
-    def __validate(self, value: str) -> None:
+    __slots__ = ()
+
+    def _validate(self, value: str) -> None:
         if not (len(value) > 2):
             raise ValueError(f'Name "{value}" is too short!')
 
 class Phone(AbstractField):
-    def _validate(self, value: str) -> None:
-        value = re.sub(r'[ \(\)\-]', '', value)
-        phone_pattern = re.compile(r'\+380\d{9}|380\d{9}|80\d{9}|0\d{9}')
-        if re.fullmatch(phone_pattern, value) is None:
+    __slots__ = ()
+    _STRIP: t.ClassVar[dict[int, int | None]] = str.maketrans('', '', ' ()-')
+    _RE: t.ClassVar[re.Pattern[str]] = re.compile(r'(?:\+?380|80|0)\d{9}')
+
+    def _validate(self, value: str) -> str:
+        value = value.translate(self._STRIP)
+        if self._RE.fullmatch(value) is None:
             raise ValueError(f'Value {value} is not in correct format! Enter phone in format "+380xx3456789"')
-        return f"+380{value[-9:]}"
+        return self._normalize(value)
+
+    def _load(self, value: str) -> None:
+        # snapshots written before phones were normalized may still hold e.g. "050 123 45 67"
+        self._value = self._normalize(value)
+
+    def _normalize(self, value: str) -> str:
+        return f"+380{value.translate(self._STRIP)[-9:]}"
 
 class Email(AbstractField):
+    __slots__ = ()
+    _RE: t.ClassVar[re.Pattern[str]] = re.compile(r'[a-zA-Z][\S.]+@[a-zA-Z]+\.[a-zA-Z]{2,}')
+
     def _validate(self, value: str) -> None:
-        email_pattern = re.compile(r'[a-zA-Z]{1}[\S.]+@[a-zA-Z]+\.[a-zA-Z]{2,}')
-        if re.fullmatch(email_pattern, value) is None:
+        if self._RE.fullmatch(value) is None:
             raise ValueError(
                 f'Value {value} is not in correct format! Enter it in format "email prefix @ email domain"')
 
 class Birthday(AbstractField):
+    __slots__ = ('_date',)
+    _date: date
+
     def _validate(self, value: str) -> None:
         try:
             b_day = date.fromisoformat(value)
@@ -67,12 +122,19 @@ class Birthday(AbstractField):
             raise ValueError(f'Birthday {value} is not correct format! for example "2023-12-30"')
         if b_day.year > date.today().year:
             raise ValueError(f'{value} -  you from the future?')
+        self._date = b_day  # parsed once here, the value can't change afterwards
+
+    def _load(self, value: str) -> None:
+        self._value = value
+        self._date = date.fromisoformat(value)
 
     def get_date(self) -> date:
-        return date.fromisoformat(self.value)
+        return self._date
 
 
 class Address(AbstractField):
+    __slots__ = ()
+
     def _validate(self, value: str) -> None:
         if value.isspace():
             raise ValueError(f'Address "{value}" is not in correct format!')
@@ -82,75 +144,155 @@ class Address(AbstractField):
 
 
 class Record: #validation and conversion of field values are already handled by the respective field classes.
+    __slots__ = ('name', 'phones', 'email', 'birthday', 'address', '_books', '_search_blob')
+
     def __init__(
             self,
             name: Name | str,
-            phones: list[Phone] | list[str] = [],
+            phones: list[Phone] | list[str] | None = None,
             email: Email | str | None = None,
             birthday: Birthday | str | None = None,
             address: Address | str | None = None,
     ) -> None:
         self.name = self._name(name)
-        self.phones = [self._phone(phone) for phone in phones]
+        self.phones: dict[str, Phone] = {}  # keyed by phone value, keeps insertion order
+        for phone in phones or ():
+            phone = self._phone(phone)
+            self.phones[phone.value] = phone
         self.email = None if email is None else self._email(email)
         self.birthday = None if birthday is None else self._birthday(birthday)
         self.address = None if address is None else self._address(address)
+        # (weak reference to a book, key) for every address book holding this record, notified on
+        # changes; weak so that a record does not keep a dropped book and its indexes alive
+        self._books: list[tuple[weakref.ref[AddressBook], str]] = []
+        self._search_blob: str | None = None  # lowercased search text, built lazily
+
+    @classmethod
+    def _from_trusted(
+            cls,
+            name: str,
+            phones: t.Iterable[str],
+            email: str | None,
+            birthday: str | None,
+            address: str | None,
+    ) -> t.Self:
+        # builds a record from values produced by to_dict without validating them again
+        return cls(
+            Name._trusted(name),
+            [Phone._trusted(phone) for phone in phones],
+            None if email is None else Email._trusted(email),
+            None if birthday is None else Birthday._trusted(birthday),
+            None if address is None else Address._trusted(address),
+        )
+
+    def __reduce__(self) -> tuple:
+        # rebuilt from its fields, without the books it belongs to; they re-attach it when restored
+        return self.__class__, (self.name, list(self.phones.values()), self.email, self.birthday, self.address)
+
+    def _changed(self) -> None:
+        self._search_blob = None
+        live_books = []
+        for book_ref, key in self._books:
+            if (book := book_ref()) is not None:
+                book._reindex(key, self)
+                live_books.append((book_ref, key))
+        self._books = live_books
+
+    def _search_text(self) -> str:
+        if self._search_blob is None:
+            self._search_blob = (f'{self.name}'
+                                 f'{" ".join(str(ph) for ph in self.phones.values())}'
+                                 f'{self.email}'
+                                 f'{self.birthday}'
+                                 f'{self.address}'
+                                 ).lower()
+        return self._search_blob
+
+    def _name(self, name: str | Name) -> Name:
+        if not isinstance(name, Name):
+            name = Name(name)
+        return name
+
+    def _phone(self, phone: str | Phone) -> Phone:
+        if not isinstance(phone, Phone):
+            phone = Phone(phone)
+        return phone
+
+    def _email(self, email: str | Email) -> Email:
+        if not isinstance(email, Email):
+            email = Email(email)
+        return email
+
+    def _birthday(self, birthday: str | Birthday) -> Birthday:
+        if not isinstance(birthday, Birthday):
+            birthday = Birthday(birthday)
+        return birthday
+
+    def _address(self, address: str | Address) -> Address:
+        if not isinstance(address, Address):
+            address = Address(address)
+        return address
 
     def add_phone(self, phone: Phone | str) -> None:
-        if phone in self.phones:
+        phone = self._phone(phone)
+        if phone.value in self.phones:
             raise ValueError("this phone number has already been added")
 
-        phone = self._phone(phone)
-        self.phones.append(phone)
+        self.phones[phone.value] = phone
+        self._changed()
 
     def remove_phone(self, phone: Phone | str) -> None:
         phone = self._phone(phone)
-        if phone not in self.phones:
+        if phone.value not in self.phones:
             raise ValueError(f"The phone '{phone}' is not in this record.")
-        self.phones.remove(phone)
+        del self.phones[phone.value]
+        self._changed()
 
     def change_phone(self, old_phone: Phone | str, new_phone: Phone | str) -> None:
-        if (old_phone := self._phone(old_phone)) not in self.phones:
+        old = self._phone(old_phone)
+        if old.value not in self.phones:
             raise ValueError(
-                f"The phone '{old_phone}' is not in this record '{self.name}'."
+                f"The phone '{old}' is not in this record '{self.name}'."
             )
-        if (new_phone := self._phone(new_phone)) in self.phones:
+        new = self._phone(new_phone)
+        if new.value in self.phones:
             raise ValueError(
-                f"The phone '{new_phone}' already in record '{self.name}'."
+                f"The phone '{new}' already in record '{self.name}'."
             )
-        inx = self.phones.index(old_phone)
-        self.phones[inx] = new_phone
+        del self.phones[old.value]
+        self.phones[new.value] = new
+        self._changed()
 
-    def change_email(self, email: Email) -> None:
+    def change_email(self, email: Email | str) -> None:
         self.email = self._email(email)
+        self._changed()
 
-    def change_birthday(self, birthday: Birthday) -> None:
+    def change_birthday(self, birthday: Birthday | str) -> None:
         self.birthday = self._birthday(birthday)
+        self._changed()
 
     def days_to_birthday(self) -> int:
         if self.birthday == None:
             raise KeyError(f"No birthday set for the contact {self.name}.")
 
         today = date.today()
-        try:
-            bday = self.birthday.get_date().replace(year=today.year)
-            if (today > bday):
-                bday = bday.replace(year=today.year + 1)
-            return (bday - today).days
-
-        except ValueError:
-            exept_temp = Record(self.name, [], today.replace(month=2, day=28).isoformat())
-            return exept_temp.days_to_birthday() + 1
-
-    def change_address(self, address: Address) -> None:
+        today_ord = today.toordinal()
+        birthday = self.birthday.get_date()
+        bday_ord = _birthday_ordinal(today.year, birthday)
+        if today_ord > bday_ord:
+            bday_ord = _birthday_ordinal(today.year + 1, birthday)
+        return bday_ord - today_ord
+
+    def change_address(self, address: Address | str) -> None:
         self.address = self._address(address)
+        self._changed()
 
     def __str__(self) -> str:
 
         birthday_str = f'birthday: {self.birthday or "Empty"}'
         email_str = f'email: {self.email or "Empty"}'
         address_str = f'address: {self.address or "Empty"}'
-        phones_str = ", ".join([str(ph) for ph in self.phones])
+        phones_str = ", ".join(str(ph) for ph in self.phones.values())
         return (
             f'<Record>:\n\tname: {self.name}\n'
             f'\tphones: {phones_str or "Empty"}\n'
@@ -163,14 +305,14 @@ class Record: #validation and conversion of field values are already handled by
 
         return (
             f"Record(name={self.name!r}, "
-            f'phones=[{", ".join([ph.__repr__() for ph in self.phones])}, '
+            f'phones=[{", ".join(repr(ph) for ph in self.phones.values())}], '
             f'email={self.email!r}, '
-            f'birthday={self.birthday!r},'
+            f'birthday={self.birthday!r}, '
             f'address={self.address!r})'
         )
 
     def to_dict(self) -> dict[str, dict[str, list[str] | str | None]]:
-        phones = [str(phone) for phone in self.phones]
+        phones = [str(phone) for phone in self.phones.values()]
         email = None if self.email is None else str(self.email)
         birthday = None if self.birthday is None else str(self.birthday)
         address = None if self.address is None else str(self.address)
@@ -215,10 +357,85 @@ class AbstractAddressBook(ABC):
         pass
 
     @abstractmethod
-    def iterate_records(self, item_number: int) -> t.Generator[Record, int, None]:
+    def iterate_records(self, item_number: int) -> t.Generator[list[Record], None, None]:
         pass
 
 class AddressBook(UserDict, AbstractAddressBook):
+    # UserDict routes every change through __setitem__/__delitem__, which keep the
+    # search indexes and the records' back-references up to date
+    def __init__(self, *args, **kwargs) -> None:
+        # inverted index: n-gram of a record's searchable text -> keys of records containing it
+        self._index: dict[str, set[str]] = {}
+        self._grams: dict[str, set[str]] = {}
+        # insertion number of every key, to return search results in dict order
+        self._positions: dict[str, int] = {}
+        self._next_position = 0
+        # (month * 32 + day, key) of every record with a birthday, kept sorted
+        self._birthday_index: list[tuple[int, str]] = []
+        self._birthday_keys: dict[str, int] = {}
+        super().__init__(*args, **kwargs)
+
+    def __str__(self) -> str:
+        return "\n".join(str(record) for record in self.data.values())
+
+    def __setitem__(self, key: str, record: Record) -> None:
+        if (old_record := self.data.get(key)) is not None:
+            self._unindex(key)
+            self._detach(key, old_record)
+        else:
+            self._positions[key] = self._next_position
+            self._next_position += 1
+        self.data[key] = record
+        record._books.append((weakref.ref(self), key))
+        self._index_record(key, record)
+
+    def __delitem__(self, key: str) -> None:
+        self._unindex(key)
+        self._detach(key, self.data.pop(key))
+        del self._positions[key]
+
+    def __ior__(self, other):  # type: ignore[misc]
+        self.update(other)  # UserDict.__ior__ would write to self.data directly
+        return self
+
+    # copies and pickles are rebuilt from the records, so they get their own indexes
+    def __reduce__(self) -> tuple:
+        return self.__class__, (self.data,)
+
+    def __copy__(self) -> t.Self:
+        return self.__class__(self.data)
+
+    @classmethod
+    def fromkeys(cls, iterable, value=None):
+        raise TypeError("AddressBook keys are record names, use add_record instead")
+
+    def _detach(self, key: str, record: Record) -> None:
+        record._books = [(book_ref, book_key) for book_ref, book_key in record._books
+                         if book_ref() is not self or book_key != key]
+
+    def _index_record(self, key: str, record: Record) -> None:
+        grams = _ngrams(record._search_text())
+        self._grams[key] = grams
+        for gram in grams:
+            self._index.setdefault(gram, set()).add(key)
+        if record.birthday is not None:
+            md_key = _md_key(record.birthday.get_date())
+            self._birthday_keys[key] = md_key
+            insort(self._birthday_index, (md_key, key))
+
+    def _unindex(self, key: str) -> None:
+        for gram in self._grams.pop(key, ()):
+            keys = self._index[gram]
+            keys.discard(key)
+            if not keys:
+                del self._index[gram]
+        if (md_key := self._birthday_keys.pop(key, None)) is not None:
+            del self._birthday_index[bisect_left(self._birthday_index, (md_key, key))]
+
+    def _reindex(self, key: str, record: Record) -> None:
+        self._unindex(key)
+        self._index_record(key, record)
+
     def add_record(self, record: Record) -> None:
         self[record.name.value] = record
 
@@ -233,68 +450,92 @@ class AddressBook(UserDict, AbstractAddressBook):
             raise KeyError("Value must be a string")
         if key not in self.data:
             raise KeyError(f"Can't delete contact {key} isn't in Address Book")
-        del self.data[key]
+        del self[key]
 
     def groups_days_to_bd(self, input_days: str) -> list[Record]:
         if not input_days.isdigit():
             raise ValueError(f"Not valid days {input_days}, please input num")
         current_date = date.today()
-        time_delta = timedelta(days=int(input_days))
-        last_date = current_date + time_delta
-        list_records = []
-
-        for record in self.data.values():
-            birthday: date = record.birthday.get_date()
-            birthday = birthday.replace(year=current_date.year)
-
-            if (current_date <= birthday <= last_date):
-                list_records.append(record)
-        return list_records
+        last_date = date.fromordinal(current_date.toordinal() + int(input_days))
+        years_spanned = last_date.year - current_date.year
+        # records come out ordered by upcoming birthday
+        index, md = self._birthday_index, itemgetter(0)
+        start_md = _md_key(current_date)
+        if (current_date.month, current_date.day) == (3, 1) and not isleap(current_date.year):
+            start_md = 2 * 32 + 29  # Feb 29 birthdays fall on Mar 1 this year, as in days_to_birthday
+        start = bisect_left(index, start_md, key=md)
+        end = bisect_right(index, _md_key(last_date), key=md)
+
+        if years_spanned == 0:
+            entries = index[start:end]
+        elif years_spanned == 1 and end <= start:  # the range crosses New Year
+            entries = index[start:] + index[:end]
+        else:  # the range covers a whole year
+            entries = index[start:] + index[:start]
+        return [self.data[key] for _, key in entries]
 
     def to_dict(self) -> dict:
-        res_dict = {}
-        for record in self.data.values():
-            res_dict.update(record.to_dict())
-        return res_dict
+        # same layout as Record.to_dict, built in place to avoid a dict per record
+        return {
+            str(record.name): {
+                "phones": [str(phone) for phone in record.phones.values()],
+                "email": None if record.email is None else str(record.email),
+                "birthday": None if record.birthday is None else str(record.birthday),
+                "address": None if record.address is None else str(record.address),
+            }
+            for record in self.data.values()
+        }
 
     def from_dict(self, data_json: dict) -> None:
         if not isinstance(data_json, dict):
             raise TypeError("this is not dict")
 
+        record_cls, add_record = Record, self.add_record  # local names for the loop
         for name, record in data_json.items():
-            self.add_record(
-                Record(name=name,
-                       phones=record['phones'],
-                       email=record['email'],
-                       birthday=record['birthday'],
-                       address=record['address']),
+            add_record(
+                record_cls(name=name,
+                           phones=record.get('phones'),
+                           email=record.get('email'),
+                           birthday=record.get('birthday'),
+                           address=record.get('address')),
+            )
+
+    def from_snapshot(self, data_json: dict) -> None:
+        # like from_dict, but trusts data previously produced by to_dict and skips field validation
+        if not isinstance(data_json, dict):
+            raise TypeError("this is not dict")
+
+        from_trusted, add_record = Record._from_trusted, self.add_record  # local names for the loop
+        for name, record in data_json.items():
+            add_record(
+                from_trusted(name=name,
+                             phones=record.get('phones') or (),
+                             email=record.get('email'),
+                             birthday=record.get('birthday'),
+                             address=record.get('address')),
             )
 
     def search(self, search_word: str) -> list[Record]:
+        search_word = search_word.lower()
+        if len(search_word) < _NGRAM_SIZE:  # too short to use the index
+            return [record for record in self.data.values() if search_word in record._search_text()]
+
+        postings = sorted((self._index.get(gram, set()) for gram in _ngrams(search_word)), key=len)
+        candidates = set.intersection(*postings)
         search_list = []
-        for record in self.data.values():
-            str_val_record = (f'{record.name}'
-                              f'{" ".join([str(ph) for ph in record.phones])}'
-                              f'{record.email}'
-                              f'{record.birthday}'
-                              f'{record.address}'
-                              )
-            if search_word.lower() in str_val_record.lower():
+        for key in sorted(candidates, key=self._positions.__getitem__):
+            record = self.data[key]
+            if search_word in record._search_text():
                 search_list.append(record)
         return search_list
 
-    def iterate_records(self, item_number: int) -> t.Generator[Record, int, None]:
+    def iterate_records(self, item_number: int) -> t.Generator[list[Record], None, None]:
         if item_number <= 0:
             raise ValueError("Item number must be greater than 0.")
-        elif item_number > len(self.data):
-            item_number = len(self.data)
-
-        list_records = []
-        for counter, record in enumerate(self.data.values(), 1):
-            list_records.append(record)
-            if (not counter % item_number) or counter == len(self.data):
-                yield list_records
-                list_records = []
+
+        records = iter(self.data.values())
+        while list_records := list(islice(records, item_number)):
+            yield list_records
 
 if __name__ == "__main__":
     pass
@@ -0,0 +1,211 @@
+import copy
+from datetime import date, timedelta
+import gc
+import pickle
+import unittest
+from unittest import mock
+import weakref
+
+from AddressBook import AddressBook, Record
+
+
+class TestRecordPhones(unittest.TestCase):
+    def test_field_value_is_read_only(self):
+        record = Record('Alice', ['0501112233'])
+        phone = record.phones['+380501112233']
+        with self.assertRaises(AttributeError):
+            phone.value = '0671111111'
+
+    def test_phone_lookup_matches_any_format(self):
+        record = Record('Alice', ['050 111-22-33'])
+        with self.assertRaises(ValueError):
+            record.add_phone('+380501112233')
+        record.change_phone('0501112233', '0671111111')
+        record.remove_phone('+380 (67) 111-11-11')
+        self.assertEqual(record.phones, {})
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.book = AddressBook()
+
+    def names(self, records):
+        return [record.name.value for record in records]
+
+    def test_record_changes_are_reindexed(self):
+        record = Record('Alice', ['0501112233'])
+        self.book.add_record(record)
+        record.add_phone('0671112233')
+        record.change_phone('0501112233', '0931112233')
+        record.change_email('alice@mail.com')
+        self.assertEqual(self.names(self.book.search('067111')), ['Alice'])
+        self.assertEqual(self.names(self.book.search('093111')), ['Alice'])
+        self.assertEqual(self.book.search('050111'), [])
+        self.assertEqual(self.names(self.book.search('alice@')), ['Alice'])
+
+    def test_replaced_record_no_longer_updates_index(self):
+        old = Record('Alice', ['0671111111'])
+        new = Record('Alice', ['0672222222'], None, '1990-01-01')
+        self.book.add_record(old)
+        self.book.add_record(new)
+        old.change_email('old@mail.com')
+        self.assertEqual(self.book.search('067222'), [new])
+        self.assertEqual(self.book.search('067111'), [])
+        self.assertEqual(self.book.search('old@'), [])
+        self.assertEqual(self.book.groups_days_to_bd('366'), [new])
+
+    def test_cached_search_text_follows_changes(self):
+        record = Record('Alice', None, 'alice@mail.com')
+        self.book.add_record(record)
+        self.assertEqual(self.book.search('al'), [record])  # fills the cached text
+        with self.assertRaises(AttributeError):
+            record.email.value = 'zed@mail.com'
+        record.change_email('zed@mail.com')
+        self.assertEqual(self.book.search('zed'), [record])
+        self.assertEqual(self.book.search('ze'), [record])
+        self.assertEqual(self.book.search('alice@'), [])
+
+    def test_record_under_other_key(self):
+        record = Record('Carol', ['0501112233'])
+        self.book['alias'] = record
+        record.add_phone('0671112233')
+        self.assertEqual(self.book.search('carol'), [record])
+        self.assertEqual(self.book.search('067111'), [record])
+
+    def test_record_shared_between_books(self):
+        other = AddressBook()
+        record = Record('Alice', ['0501112233'])
+        self.book.add_record(record)
+        other.add_record(record)
+        record.add_phone('0671112233')
+        self.assertEqual(self.book.search('067111'), [record])
+        self.assertEqual(other.search('067111'), [record])
+        del other['Alice']
+        record.add_phone('0931112233')
+        self.assertEqual(self.book.search('093111'), [record])
+        self.assertEqual(other.search('093111'), [])
+
+    def test_record_does_not_keep_book_alive(self):
+        record = Record('Alice', ['0501112233'])
+        book = AddressBook()
+        book.add_record(record)
+        book_ref = weakref.ref(book)
+        del book
+        gc.collect()
+        self.assertIsNone(book_ref())
+        record.add_phone('0671112233')
+        self.assertEqual(record._books, [])
+
+    def test_name_cannot_be_changed_in_place(self):
+        record = Record('Alice')
+        self.book.add_record(record)
+        with self.assertRaises(AttributeError):
+            record.name.value = 'Alicia'
+
+    def test_results_keep_insertion_order(self):
+        for name, phone in (('Zed', '0501111111'), ('Amy', '0502222222'), ('Kim', '0503333333')):
+            self.book.add_record(Record(name, [phone]))
+        self.assertEqual(self.names(self.book.search('05')), ['Zed', 'Amy', 'Kim'])
+        self.assertEqual(self.names(self.book.search('050')), ['Zed', 'Amy', 'Kim'])
+
+
+class FakeDate(date):
+    current = date(2027, 3, 1)
+
+    @classmethod
+    def today(cls):
+        return cls.fromordinal(cls.current.toordinal())
+
+
+class TestBirthdays(unittest.TestCase):
+    def setUp(self):
+        self.book = AddressBook()
+        for number, birthday in enumerate(('1990-01-01', '1991-02-28', '2000-02-29', '1992-03-01',
+                                           '1993-06-15', '1994-12-31', '1995-10-15')):
+            self.book.add_record(Record(f'Person{number}', None, None, birthday))
+        self.book.add_record(Record('Nobody'))
+
+    def test_groups_days_to_bd_matches_days_to_birthday(self):
+        # every start day over four years, so Feb 29 is checked in leap and non-leap years
+        with mock.patch('AddressBook.date', FakeDate):
+            for offset in range(4 * 365 + 1):
+                FakeDate.current = date(2025, 1, 1) + timedelta(days=offset)
+                for days in (0, 1, 30, 364, 365):
+                    expected = {record.name.value for record in self.book.values()
+                                if record.birthday is not None and record.days_to_birthday() <= days}
+                    found = [record.name.value for record in self.book.groups_days_to_bd(str(days))]
+                    self.assertEqual(len(found), len(set(found)))
+                    self.assertEqual(set(found), expected, (FakeDate.current, days))
+
+    def test_feb_29_on_mar_1_of_non_leap_year(self):
+        with mock.patch('AddressBook.date', FakeDate):
+            FakeDate.current = date(2027, 3, 1)
+            leap = self.book['Person2']
+            self.assertEqual(leap.days_to_birthday(), 0)
+            self.assertIn(leap, self.book.groups_days_to_bd('0'))
+
+    def test_birthday_changes_are_reindexed(self):
+        with mock.patch('AddressBook.date', FakeDate):
+            FakeDate.current = date(2027, 6, 10)
+            record = self.book['Person4']
+            self.assertIn(record, self.book.groups_days_to_bd('10'))
+            with self.assertRaises(AttributeError):
+                record.birthday.value = '1993-09-01'
+            record.change_birthday('1993-09-01')
+            self.assertNotIn(record, self.book.groups_days_to_bd('10'))
+            self.assertIn(record, self.book.groups_days_to_bd('83'))
+
+
+class TestAddressBookContainer(unittest.TestCase):
+    def setUp(self):
+        self.book = AddressBook()
+        self.book.add_record(Record('Alice', ['0501112233']))
+        self.book.add_record(Record('Bobby', ['0672223344']))
+
+    def test_copies_have_their_own_index(self):
+        for other in (self.book.copy(), copy.copy(self.book), copy.deepcopy(self.book),
+                      pickle.loads(pickle.dumps(self.book))):
+            self.assertIsInstance(other, AddressBook)
+            other.add_record(Record('Carol', ['0931112233']))
+            self.assertEqual([r.name.value for r in other.search('0931')], ['Carol'])
+            self.assertEqual(self.book.search('0931'), [])
+            self.assertEqual([r.name.value for r in other.search('0672')], ['Bobby'])
+
+    def test_merge_operators_index_new_records(self):
+        merged = self.book | {'Carol': Record('Carol', ['0931112233'])}
+        self.assertEqual([r.name.value for r in merged.search('0931')], ['Carol'])
+        self.book |= {'Carol': Record('Carol', ['0931112233'])}
+        self.assertEqual([r.name.value for r in self.book.search('0931')], ['Carol'])
+
+    def test_removing_records_unindexes_them(self):
+        self.book.pop('Alice')
+        self.book.popitem()
+        self.assertEqual(self.book.search('050'), [])
+        self.assertEqual(self.book.search('067'), [])
+        self.book.add_record(Record('Carol', ['0931112233']))
+        self.book.clear()
+        self.assertEqual(self.book.search('093'), [])
+
+    def test_from_snapshot_round_trip(self):
+        self.book['Alice'].change_birthday('2000-02-29')
+        loaded = AddressBook()
+        loaded.from_snapshot(self.book.to_dict())
+        self.assertEqual(loaded.to_dict(), self.book.to_dict())
+        self.assertEqual(loaded['Alice'].birthday.get_date(), date(2000, 2, 29))
+        self.assertEqual([r.name.value for r in loaded.search('0672')], ['Bobby'])
+
+    def test_from_snapshot_normalizes_old_phone_format(self):
+        loaded = AddressBook()
+        loaded.from_snapshot({'Alice': {'phones': ['050 123 45 67']}})
+        record = loaded['Alice']
+        self.assertEqual(list(record.phones), ['+380501234567'])
+        with self.assertRaises(ValueError):
+            record.add_phone('0501234567')
+
+    def test_fromkeys_is_rejected(self):
+        with self.assertRaises(TypeError):
+            AddressBook.fromkeys(['Alice'])
+
+
+if __name__ == '__main__':
+    unittest.main()